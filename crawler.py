@@ -1,107 +1,223 @@
+import io
+import os
+import logging
+import hashlib
 import re
+import sys
+import random
 import json
-from typing import Dict, Any, List, Optional
+import asyncio
+import functools
+import multiprocessing
+from typing import Dict, Any, List, Optional, Set, Tuple, Union
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
 from urllib.parse import urljoin
 from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
 
 import httpx
+import soupsieve
+from aiolimiter import AsyncLimiter
+from lxml import etree
 from bs4 import BeautifulSoup
+import hishel
 from normalizer import normalize_requirements
 
 __all__ = ["crawl_all_sets", "parse_set_page", "discover_set_links"]
 
+logger = logging.getLogger(__name__)
+
 HOME = "https://www.fut.gg"
 SET_URL_RE = re.compile(r"^/sbc/(?:[^/]+/)?(?:\d{2}-\d{1,6}-|[A-Za-z0-9-]+/?)")
+# One pass over the page text; the keyword group decides priority afterwards
+EXPIRY_RE = re.compile(
+    r"(expires?|ends?|available until):?\s*(\d{1,2})[/\-](\d{1,2})[/\-](\d{4})", re.I
+)
+EXPIRY_PRIORITY = ("exp", "end", "ava")
 
 # ---------------- HTTP ----------------
 
-async def fetch_html(client: httpx.AsyncClient, url: str) -> str:
-    headers = {
-        "User-Agent": (
-            "Mozilla/5.0 (Windows NT 10.0; Win64; x64) "
-            "AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0 Safari/537.36"
-        ),
-        "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8",
-        "Accept-Language": "en-US,en;q=0.5",
-        "Accept-Encoding": "gzip, deflate",
-        "Connection": "keep-alive",
-        "Upgrade-Insecure-Requests": "1",
-        "Cache-Control": "max-age=0",
-    }
-    r = await client.get(url, timeout=30, follow_redirects=True, headers=headers)
-    r.raise_for_status()
-    return r.text
+# Sent once per client rather than rebuilt on every request. No "Connection"
+# header: keep-alive is the pool's job, and HTTP/2 forbids the header outright.
+BASE_HEADERS = {
+    "User-Agent": (
+        "Mozilla/5.0 (Windows NT 10.0; Win64; x64) "
+        "AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0 Safari/537.36"
+    ),
+    "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8",
+    "Accept-Language": "en-US,en;q=0.5",
+    "Accept-Encoding": "zstd, br, gzip, deflate",
+    "Upgrade-Insecure-Requests": "1",
+    "Cache-Control": "max-age=0",
+}
+HTTP_LIMITS = httpx.Limits(max_keepalive_connections=32, max_connections=64, keepalive_expiry=30)
+PAGE_ENCODING = "utf-8"  # fut.gg serves UTF-8; libxml2 would otherwise guess Latin-1 for bytes
+# Next to this module by default, so the cache doesn't move with the process CWD
+HTTP_CACHE_DIR = Path(os.getenv("SBC_HTTP_CACHE_DIR", Path(__file__).resolve().parent / ".httpcache"))
+# Entries untouched for this long (expired SBCs nobody requests again) are evicted
+HTTP_CACHE_TTL = 3 * 24 * 60 * 60  # seconds
+
+def make_client() -> httpx.AsyncClient:
+    """Shared crawl client; revalidates every page through the on-disk HTTP cache."""
+    # Limits belong to the transport once one is passed in explicitly.
+    # Every cached page is revalidated (ETag/Last-Modified), so unchanged
+    # ones come back as empty 304s; heuristics let pages without explicit
+    # freshness headers be stored at all.
+    transport = hishel.AsyncCacheTransport(
+        transport=httpx.AsyncHTTPTransport(http2=True, limits=HTTP_LIMITS),
+        storage=hishel.AsyncFileStorage(base_path=HTTP_CACHE_DIR, ttl=HTTP_CACHE_TTL),
+        controller=hishel.Controller(always_revalidate=True, allow_heuristics=True),
+    )
+    return httpx.AsyncClient(
+        http2=True, limits=HTTP_LIMITS, headers=BASE_HEADERS, timeout=30, transport=transport
+    )
+
+# Steady request rate against fut.gg instead of bursts that end in 429s
+MAX_REQUESTS_PER_SECOND = 10
+RATE_LIMITER = AsyncLimiter(MAX_REQUESTS_PER_SECOND, time_period=1)
+RETRY_STATUSES = frozenset({429, 500, 502, 503, 504})
+MAX_ATTEMPTS = 5
+MAX_RETRY_DELAY = 30  # seconds; also caps an oversized Retry-After
+
+def _retry_delay(r: httpx.Response, attempt: int) -> float:
+    # Honour the server's Retry-After (delta-seconds or HTTP-date) when it
+    # sends one; otherwise back off exponentially, jittered so throttled
+    # workers don't all retry in the same instant.
+    retry_after = r.headers.get("Retry-After")
+    if retry_after:
+        try:
+            delay = float(retry_after)
+        except ValueError:
+            try:
+                delay = (parsedate_to_datetime(retry_after) - datetime.now(timezone.utc)).total_seconds()
+            except (TypeError, ValueError):
+                delay = None
+        if delay is not None:
+            return min(MAX_RETRY_DELAY, max(0.0, delay))
+    return min(MAX_RETRY_DELAY, 2 ** attempt + random.random())
+
+async def fetch_html(client: httpx.AsyncClient, url: str) -> bytes:
+    # Raw body: the lxml-backed parsers decode it themselves, so there is no
+    # need for httpx to build a str copy of every page first.
+    for attempt in range(MAX_ATTEMPTS):
+        async with RATE_LIMITER:
+            r = await client.get(url, timeout=30, follow_redirects=True)
+        if r.status_code in RETRY_STATUSES and attempt < MAX_ATTEMPTS - 1:
+            delay = _retry_delay(r, attempt)
+            logger.debug("HTTP %d for %s, retrying in %.1fs", r.status_code, url, delay)
+            await asyncio.sleep(delay)
+            continue
+        r.raise_for_status()
+        return r.content
 
 # -------------- Link discovery --------------
 
-def discover_set_links(list_html: str) -> List[str]:
-    soup = BeautifulSoup(list_html, "html.parser")
+def discover_set_links(list_html: Union[str, bytes]) -> Set[str]:
+    if not list_html or not list_html.strip():
+        return set()
+    if isinstance(list_html, str):
+        list_html = list_html.encode(PAGE_ENCODING)
     links: set[str] = set()
 
-    for a in soup.select("a[href]"):
-        href = a.get("href", "")
-        if not href:
+    # Only the anchors' href values are needed, so stream <a> end events and
+    # drop each element (and its already-seen siblings) once it's been read;
+    # memory stays flat however large the listing page is.
+    for _, a in etree.iterparse(
+        io.BytesIO(list_html), events=("end",), tag="a", html=True, encoding=PAGE_ENCODING
+    ):
+        href = a.get("href")
+        a.clear()
+        while a.getprevious() is not None:
+            del a.getparent()[0]
+        # Cheap prefix check first; most anchors are nav/footer links
+        if not href or not href.startswith("/sbc/"):
             continue
-        clean = href.split("#")[0].split("?")[0]
-        if (
-            clean.startswith("/sbc/")
-            and len(clean) > 5
-            and clean != "/sbc/"
-            and not clean.endswith("/sbc")
-        ):
-            links.add(urljoin(HOME, clean))
-
-    print(f"🔍 Discovered {len(links)} unique SBC links")
-    return sorted(links)
+        clean = href.partition("#")[0].partition("?")[0]
+        if len(clean) > 5 and not clean.endswith("/sbc"):
+            # HOME is a bare origin and clean is root-relative, so plain
+            # concatenation matches urljoin unless there are dot segments
+            links.add(HOME + clean if "/." not in clean else urljoin(HOME, clean))
+
+    logger.debug("Discovered %d unique SBC links", len(links))
+    return links
 
 # -------------- Requirement helpers --------------
 
+SKIP_RE = re.compile(
+    r"solution|cheapest|price|reward|pack|instagram|discord|squad builder"
+    r"|fill player positions|building chemistry|challenges|total cost"
+)
+KW_RE = re.compile(
+    r"min|max|exactly|chemistry|rating|players from|league|club|nation"
+    r"|ovr|overall|same|different|rare|gold|silver|bronze"
+)
+DIGIT_RE = re.compile(r"\d")
+
 def is_valid_requirement(text: str) -> bool:
     t = (text or "").lower().strip()
-    if not t:
-        return False
-    skip = [
-        "solution", "cheapest", "price", "reward", "pack", "instagram", "discord",
-        "squad builder", "fill player positions", "building chemistry",
-        "challenges", "total cost",
-    ]
-    if any(s in t for s in skip):
+    if not t or SKIP_RE.search(t) or not KW_RE.search(t):
         return False
-    must_have = [
-        "min", "max", "exactly", "chemistry", "rating", "players from", "league",
-        "club", "nation", "ovr", "overall", "same", "different", "rare", "gold", "silver", "bronze"
-    ]
-    has_kw = any(k in t for k in must_have)
-    has_num = any(ch.isdigit() for ch in t)
-    return has_kw and (has_num or "same" in t or "different" in t) and 8 <= len(t) <= 160
+    has_num = DIGIT_RE.search(t) is not None
+    return (has_num or "same" in t or "different" in t) and 8 <= len(t) <= 160
 
 def extract_requirements_from_container(container) -> List[str]:
     reqs: List[str] = []
 
-    for li in container.select("ul li, ol li"):
+    # One walk over the subtree, bucketed by strategy; text is only pulled
+    # for the tier that is actually consulted.
+    list_items, blocks = [], []
+    for el in container.find_all(("li", "div", "span", "p")):
+        if el.name != "li":
+            blocks.append(el)
+        elif el.find_parent(("ul", "ol")) is not None:
+            list_items.append(el)
+
+    # Nested blocks and list items often flatten to the same text; each
+    # distinct string only needs validating once across all three tiers
+    # (a later tier only runs when every string checked so far was rejected).
+    checked: Set[str] = set()
+    for li in list_items:
         s = li.get_text(strip=True)
-        if is_valid_requirement(s):
-            reqs.append(s)
+        if s not in checked:
+            checked.add(s)
+            if is_valid_requirement(s):
+                reqs.append(s)
     if not reqs:
-        for el in container.select("div, span, p"):
+        for el in blocks:
             s = el.get_text(strip=True)
-            if is_valid_requirement(s) and len(s) < 200:
-                reqs.append(s)
+            if s not in checked:
+                checked.add(s)
+                if is_valid_requirement(s) and len(s) < 200:
+                    reqs.append(s)
     if not reqs:
-        for line in container.get_text("\n", strip=True).splitlines():
-            s = line.strip()
-            if is_valid_requirement(s):
-                reqs.append(s)
+        # Text nodes one at a time rather than one joined copy of the subtree;
+        # a node can still hold several lines, so those are split as before
+        for text in container.stripped_strings:
+            for line in text.splitlines():
+                s = line.strip()
+                if s not in checked:
+                    checked.add(s)
+                    if is_valid_requirement(s):
+                        reqs.append(s)
+
+    return reqs
+
+def _normalize_one(reqs: List[str]) -> List[Dict[str, Any]]:
+    # Fall back to raw text for this challenge only if the normalizer blows up
+    try:
+        return normalize_requirements(reqs)
+    except Exception:
+        return [{"kind": "raw", "text": s} for s in reqs]
 
-    seen, out = set(), []
-    for r in reqs:
-        if r not in seen:
-            seen.add(r)
-            out.append(r)
-    return out
+def _normalize_groups(groups: List[List[str]]) -> List[List[Dict[str, Any]]]:
+    # Every challenge on a page in one pass; a bad group doesn't cost the others
+    return [_normalize_one(reqs) for reqs in groups]
 
 # -------------- Next.js JSON helpers --------------
 
+NEXT_DATA_XP = etree.XPath('//script[@id="___NEXT_DATA__" or @id="__NEXT_DATA__"]')
+
 def _find_in_json(obj, want_keys=("requirements", "subChallenges", "challenges")):
     found = []
     stack = [obj]
@@ -116,26 +232,28 @@ def _find_in_json(obj, want_keys=("requirements", "subChallenges", "challenges")
             stack.extend(cur)
     return found
 
-def _parse_next_data(soup: BeautifulSoup) -> Optional[Dict[str, Any]]:
-    script = soup.select_one('script#___NEXT_DATA__') or soup.select_one('script#__NEXT_DATA__')
-    if not script or not script.string:
+def _parse_next_data(tree: etree._Element) -> Optional[Dict[str, Any]]:
+    scripts = NEXT_DATA_XP(tree)
+    if not scripts or not scripts[0].text:
         return None
     try:
-        data = json.loads(script.string)
+        data = json.loads(scripts[0].text)
     except Exception:
         return None
 
+    # One walk over the JSON serves both the page name and the challenges
+    raw_challenges = _find_in_json(data)
+
     name = None
     # heuristic: pick first title/name we see in a challenge-like node
-    for node in _find_in_json(data, ("requirements", "subChallenges", "challenges")):
+    for node in raw_challenges:
         nm = node.get("title") or node.get("name")
         if nm and len(str(nm)) > 3:
             name = str(nm)
             break
-
-    raw_challenges = _find_in_json(data)
     sub_challenges: List[Dict[str, Any]] = []
     rewards: List[Dict[str, Any]] = []
+    req_groups: List[List[str]] = []
 
     for ch in raw_challenges:
         title = ch.get("name") or ch.get("title")
@@ -163,10 +281,7 @@ def _parse_next_data(soup: BeautifulSoup) -> Optional[Dict[str, Any]]:
             else:
                 req_texts.append(str(x))
 
-        try:
-            normalized = normalize_requirements(req_texts)
-        except Exception:
-            normalized = [{"kind": "raw", "text": s} for s in req_texts]
+        req_groups.append(req_texts)
 
         reward_text = ch.get("rewardText") or ch.get("reward") or None
         if reward_text:
@@ -176,9 +291,11 @@ def _parse_next_data(soup: BeautifulSoup) -> Optional[Dict[str, Any]]:
             "name": str(title),
             "cost": ch.get("cost") if isinstance(ch.get("cost"), int) else None,
             "reward": reward_text,
-            "requirements": normalized,
         })
 
+    for ch, normalized in zip(sub_challenges, _normalize_groups(req_groups)):
+        ch["requirements"] = normalized
+
     if not name and sub_challenges:
         name = sub_challenges[0]["name"]
 
@@ -190,30 +307,115 @@ def _parse_next_data(soup: BeautifulSoup) -> Optional[Dict[str, Any]]:
 
 # -------------- Page parsing --------------
 
-def _extract_expiry(soup: BeautifulSoup) -> Optional[datetime]:
-    txt = soup.get_text(" ", strip=True)
-    for pat in (
-        r"expires?:?\s*(\d{1,2}[/\-]\d{1,2}[/\-]\d{4})",
-        r"ends?:?\s*(\d{1,2}[/\-]\d{1,2}[/\-]\d{4})",
-        r"available until:?\s*(\d{1,2}[/\-]\d{1,2}[/\-]\d{4})",
-    ):
-        m = re.search(pat, txt, re.I)
+# Compiled once so soupsieve doesn't re-parse the selector strings per page/container
+CHALLENGE_SEL = soupsieve.compile(
+    ".challenge, .squad, .sbc-challenge, [class*='challenge'], [class*='squad'], "
+    ".card, section, article"
+)
+HEADING_TAGS = frozenset({"h1", "h2", "h3"})
+TITLE_CLASSES = frozenset({"title", "name", "heading", "font-bold", "text-lg"})
+HEADING_REJECT = frozenset({"requirements", "reward", "rewards", "cost", "squad", "team", "challenges"})
+HTML_PARSER = etree.HTMLParser(encoding=PAGE_ENCODING)
+# Text nodes BeautifulSoup's get_text() would keep: it skips script, style,
+# template and ruby annotation strings, and never sees comments.
+PAGE_TEXT_XP = etree.XPath(
+    "//text()[not(ancestor::script or ancestor::style or ancestor::template"
+    " or ancestor::rt or ancestor::rp)]"
+)
+# Page-title candidates in priority order: h1, h2, then these classes
+PAGE_TITLE_TAGS = ("h1", "h2")
+PAGE_TITLE_CLASSES = ("page-title", "sbc-title", "title")
+
+def _page_title(soup: BeautifulSoup) -> Optional[str]:
+    # One walk records the first element for each candidate (plus <title>),
+    # returning straight away if the first <h1> is usable; the rest are then
+    # tried in priority order, taking the first with more than three characters.
+    slots = len(PAGE_TITLE_TAGS) + len(PAGE_TITLE_CLASSES)
+    firsts: List[Any] = [None] * slots
+    title_tag = None
+    for el in soup.descendants:
+        if el.name is None:
+            continue
+        if el.name in PAGE_TITLE_TAGS:
+            i = PAGE_TITLE_TAGS.index(el.name)
+            if firsts[i] is None:
+                firsts[i] = el
+                if i == 0:
+                    # The first <h1> outranks everything else, so its text is
+                    # only ever needed here
+                    txt = el.get_text(strip=True)
+                    if len(txt) > 3:
+                        return txt
+        elif el.name == "title" and title_tag is None:
+            title_tag = el
+        classes = el.get("class")
+        if classes:
+            for j, cls in enumerate(PAGE_TITLE_CLASSES, len(PAGE_TITLE_TAGS)):
+                if firsts[j] is None and cls in classes:
+                    firsts[j] = el
+    for el in firsts[1:]:
+        if el is not None:
+            txt = el.get_text(strip=True)
+            if txt and len(txt) > 3:
+                return txt
+    if title_tag is not None:
+        return title_tag.get_text(strip=True).replace(" | FUT.GG", "").replace("FUT.GG - ", "")
+    return None
+
+def _extract_expiry(page_text: str) -> Optional[datetime]:
+    # First match per keyword, tried in the order expires > ends > available until
+    first: Dict[str, re.Match] = {}
+    for m in EXPIRY_RE.finditer(page_text):
+        first.setdefault(m.group(1)[:3].lower(), m)
+        if len(first) == len(EXPIRY_PRIORITY):
+            break
+    for kind in EXPIRY_PRIORITY:
+        m = first.get(kind)
         if not m:
             continue
-        d = m.group(1)
         try:
-            day, month, year = map(int, re.split(r"[/\-]", d))
+            day, month, year = int(m.group(2)), int(m.group(3)), int(m.group(4))
             return datetime(year, month, day, tzinfo=timezone.utc)
         except Exception:
             pass
     return None
 
-def parse_set_page(html: str, url: str, debug: bool = False) -> Dict[str, Any]:
-    soup = BeautifulSoup(html, "html.parser")
+def _container_title(container) -> Optional[str]:
+    # One walk: heading tags are tried as they're met, title-classed
+    # elements are held back and only tried if no heading is usable.
+    classed = []
+    for el in container.descendants:
+        if el.name is None:
+            continue
+        if el.name in HEADING_TAGS:
+            txt = el.get_text(strip=True)
+            if txt and txt.lower() not in HEADING_REJECT:
+                return txt
+        elif not TITLE_CLASSES.isdisjoint(el.get("class", ())):
+            classed.append(el)
+    for el in classed:
+        txt = el.get_text(strip=True)
+        if txt and txt.lower() not in HEADING_REJECT:
+            return txt
+    return None
+
+def _page_identity(url: str) -> Dict[str, str]:
+    return {"slug": url.replace(HOME, ""), "url": url}
+
+def parse_set_page(html: Union[str, bytes], url: str, debug: bool = False) -> Dict[str, Any]:
+    # lxml rejects str input carrying an encoding declaration, so str and
+    # bytes bodies both go through the bytes path
+    if isinstance(html, str):
+        html = html.encode(PAGE_ENCODING)
+    # A bare lxml tree is enough for the Next.js data and the page text; the
+    # BeautifulSoup tree is only built when the heuristics have to run.
+    tree = etree.fromstring(html, HTML_PARSER) if html and html.strip() else None
+    # Serialised once per page so text scans take a string, not the tree
+    page_text = " ".join(s for s in (t.strip() for t in PAGE_TEXT_XP(tree)) if s) if tree is not None else ""
 
     # First, try structured Next.js data
     name, rewards, sub_challenges = None, [], []
-    structured = _parse_next_data(soup)
+    structured = _parse_next_data(tree) if tree is not None else None
     if structured and structured.get("sub_challenges"):
         name = structured.get("name")
         rewards = structured.get("rewards", [])
@@ -221,57 +423,46 @@ def parse_set_page(html: str, url: str, debug: bool = False) -> Dict[str, Any]:
 
     # Fallback to HTML heuristics if needed
     if not sub_challenges:
-        for sel in ["h1", "h2", ".page-title", ".sbc-title", ".title"]:
-            el = soup.select_one(sel)
-            if el:
-                txt = el.get_text(strip=True)
-                if txt and len(txt) > 3:
-                    name = txt
-                    break
-        if not name:
-            t = soup.select_one("title")
-            if t:
-                name = t.get_text(strip=True).replace(" | FUT.GG", "").replace("FUT.GG - ", "")
+        soup = BeautifulSoup(html, "lxml", from_encoding=PAGE_ENCODING)
+        # Script/style bodies are never matched or read by the heuristics but
+        # every descendant walk would still step over them
+        for el in soup.find_all(("script", "style")):
+            el.decompose()
+        name = _page_title(soup)
 
         # reward images
-        for img in soup.select("img[alt]"):
+        for img in soup.find_all("img", alt=True):
             alt = img.get("alt", "")
             if "pack" in alt.lower():
                 rewards.append({"type": "pack", "label": alt.strip()})
 
         # challenge-like containers
-        containers = soup.select(
-            ".challenge, .squad, .sbc-challenge, [class*='challenge'], [class*='squad'], "
-            ".card, section, article"
-        )
+        # Challenge cards live in <main>; nav, header and footer sections/cards
+        # outside it are only noise for the container heuristics
+        root = soup.find("main") or soup
+        containers = CHALLENGE_SEL.select(root)
         seen = set()
+        req_groups: List[List[str]] = []
         for c in containers:
-            title = None
-            for h in c.select("h1, h2, h3, .title, .name, .heading, .font-bold, .text-lg"):
-                txt = h.get_text(strip=True)
-                if txt and txt.lower() not in {"requirements", "reward", "rewards", "cost", "squad", "team", "challenges"}:
-                    title = txt
-                    break
+            title = _container_title(c)
             if not title or title in seen:
                 continue
             reqs = extract_requirements_from_container(c)
             if not reqs:
                 continue
-            try:
-                normalized = normalize_requirements(reqs)
-            except Exception:
-                normalized = [{"kind": "raw", "text": r} for r in reqs]
-            sub_challenges.append({"name": title, "cost": None, "reward": None, "requirements": normalized})
+            req_groups.append(reqs)
+            sub_challenges.append({"name": title, "cost": None, "reward": None})
             seen.add(title)
+        for ch, normalized in zip(sub_challenges, _normalize_groups(req_groups)):
+            ch["requirements"] = normalized
 
-    expires_at = _extract_expiry(soup)
+    expires_at = _extract_expiry(page_text)
 
     if debug:
-        print(f"📊 Parsed '{name}' with {len(sub_challenges)} challenges")
+        logger.info("Parsed %r with %d challenges", name, len(sub_challenges))
 
     return {
-        "slug": url.replace(HOME, ""),
-        "url": url,
+        **_page_identity(url),
         "name": name,
         "repeatable": None,
         "expires_at": expires_at,
@@ -282,38 +473,170 @@ def parse_set_page(html: str, url: str, debug: bool = False) -> Dict[str, Any]:
 
 # -------------- Crawl entrypoint --------------
 
-async def crawl_all_sets(debug_first: bool = True) -> List[Dict[str, Any]]:
+# os.cpu_count() reports the host's cores inside a container; size the pool
+# from the CPUs this process may actually run on, and keep it small.
+_usable_cpus = len(os.sched_getaffinity(0)) if hasattr(os, "sched_getaffinity") else (os.cpu_count() or 1)
+PARSE_WORKERS = min(4, _usable_cpus)
+
+# Parse workers start from a clean interpreter rather than a fork of the
+# (threaded) server process; forkserver keeps that cheap where it exists.
+PARSE_MP_CONTEXT = multiprocessing.get_context(
+    "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+)
+
+def _init_parse_worker(level: int) -> None:
+    # Nothing is configured in a fresh worker unless re-importing the main
+    # module already did it; log to stderr at the parent's level.
+    logging.basicConfig(level=level)
+
+# Short enum-like values repeated across every requirement/reward record
+INTERNED_VALUES = ("kind", "type", "op")
+
+def _intern_payload(obj: Any) -> Any:
+    # Payloads come back from the parse workers unpickled, so every page has
+    # its own copies of the same keys ("kind", "text", ...) and kind values;
+    # intern them so the sets held until upsert share one string each.
+    if isinstance(obj, dict):
+        return {
+            sys.intern(k): sys.intern(v) if k in INTERNED_VALUES and isinstance(v, str) else _intern_payload(v)
+            for k, v in obj.items()
+        }
+    if isinstance(obj, list):
+        return [_intern_payload(v) for v in obj]
+    return obj
+
+CATEGORIES = ["live", "players", "icons", "upgrades", "foundations"]
+MAX_CONCURRENCY = 16  # crawl workers pulling set pages off the queue
+DEBUG_PAGES = os.getenv("SBC_DEBUG", "0") not in ("", "0")  # per-page debug logging
+
+# Parse results of the previous crawl keyed by (url, body digest). Pages that
+# come back unchanged (e.g. revalidated from the HTTP cache) on the next run
+# reuse them instead of going through the process pool again.
+_parse_cache: Dict[Tuple[str, bytes], Dict[str, Any]] = {}
+# Links found on each listing body of the previous crawl, keyed by body digest
+_listing_cache: Dict[bytes, Set[str]] = {}
+
+async def crawl_all_sets(debug_first: bool = DEBUG_PAGES) -> List[Dict[str, Any]]:
     results: List[Dict[str, Any]] = []
     try:
-        async with httpx.AsyncClient() as client:
-            print("🌐 Fetching main SBC page…")
-            list_html = await fetch_html(client, f"{HOME}/sbc/")
-            links = discover_set_links(list_html)
-
-            for cat in ["live", "players", "icons", "upgrades", "foundations"]:
-                try:
-                    print(f"🌐 Fetching category: {cat}")
-                    cat_html = await fetch_html(client, f"{HOME}/sbc/{cat}/")
-                    links.extend(discover_set_links(cat_html))
-                except Exception as e:
-                    print(f"⚠️ Category fetch failed ({cat}): {e}")
-
-            links = sorted(set(links))
-            print(f"🎯 Processing {len(links)} total SBC links")
-
-            for i, link in enumerate(links, 1):
-                try:
+        async with make_client() as client:
+            logger.info("Fetching main SBC page and categories: %s", ", ".join(CATEGORIES))
+            list_html, *cat_htmls = await asyncio.gather(
+                fetch_html(client, f"{HOME}/sbc/"),
+                *(fetch_html(client, f"{HOME}/sbc/{cat}/") for cat in CATEGORIES),
+                return_exceptions=True,
+            )
+            # Without the main listing there is nothing to crawl
+            if isinstance(list_html, BaseException):
+                raise list_html
+
+            # Listing bodies that match one already seen (this run or the
+            # last) reuse its links rather than being parsed again
+            listing_links: Dict[bytes, Set[str]] = {}
+
+            def _listing(html: bytes) -> Set[str]:
+                digest = hashlib.blake2b(html, digest_size=16).digest()
+                found = listing_links.get(digest)
+                if found is None:
+                    found = _listing_cache.get(digest)
+                    if found is None:
+                        found = discover_set_links(html)
+                    listing_links[digest] = found
+                return found
+
+            links = set(_listing(list_html))
+            for cat, cat_html in zip(CATEGORIES, cat_htmls):
+                if isinstance(cat_html, BaseException):
+                    logger.warning("Category fetch failed (%s): %s", cat, cat_html)
+                    continue
+                links |= _listing(cat_html)
+            _listing_cache.clear()
+            _listing_cache.update(listing_links)
+
+            # Sorted once, so crawl order is stable between runs
+            links = sorted(links)
+            logger.info("Processing %d total SBC links", len(links))
+
+            loop = asyncio.get_running_loop()
+            queue: asyncio.Queue = asyncio.Queue()
+            for item in enumerate(links):
+                queue.put_nowait(item)
+            payloads: List[Any] = [None] * len(links)
+
+            # Parsing is CPU-bound; run it in worker processes so it neither
+            # blocks the event loop nor serialises on the GIL while fetches continue.
+            digests: List[Optional[bytes]] = [None] * len(links)
+            parsed_by: Dict[bytes, int] = {}  # body digest -> index of the link that parsed it
+            pool = ProcessPoolExecutor(
+                max_workers=PARSE_WORKERS,
+                mp_context=PARSE_MP_CONTEXT,
+                initializer=_init_parse_worker,
+                initargs=(logging.getLogger().level,),
+            )
+            try:
+                async def _one(i: int, link: str) -> Optional[Dict[str, Any]]:
                     html = await fetch_html(client, link)
-                    payload = parse_set_page(html, link, debug=(debug_first and i <= 3))
-                    if payload.get("name") and (payload.get("sub_challenges") or payload.get("rewards")):
-                        results.append(payload)
-                    else:
-                        print(f"⚠️ Skipping empty set: {link}")
-                except Exception as e:
-                    print(f"💥 Failed to parse {link}: {e}")
-
-        print(f"✅ Successfully parsed {len(results)} SBC sets")
+                    # Byte-identical bodies (redirect targets, trailing-slash
+                    # aliases) are only parsed once.
+                    digest = hashlib.blake2b(html, digest_size=16).digest()
+                    digests[i] = digest
+                    if digest in parsed_by:
+                        return None
+                    parsed_by[digest] = i
+                    payload = _parse_cache.get((link, digest))
+                    if payload is None:
+                        payload = await loop.run_in_executor(
+                            pool, parse_set_page, html, link, debug_first and DEBUG_PAGES and i < 3
+                        )
+                    return payload
+
+                async def _worker() -> None:
+                    while True:
+                        try:
+                            i, link = queue.get_nowait()
+                        except asyncio.QueueEmpty:
+                            return
+                        try:
+                            payloads[i] = await _one(i, link)
+                        except Exception as e:
+                            payloads[i] = e
+
+                await asyncio.gather(*(_worker() for _ in range(MAX_CONCURRENCY)))
+            finally:
+                # shutdown() joins the workers; do that off the event loop, and
+                # drop any parses still queued if the crawl was cancelled
+                await loop.run_in_executor(None, functools.partial(pool.shutdown, cancel_futures=True))
+
+            # Which alias of a shared body got parsed depends on fetch timing;
+            # the payload always goes to the first alias in link order so its
+            # slug/url (and the row it upserts) don't change between runs.
+            first_index: Dict[bytes, int] = {}
+            for i, digest in enumerate(digests):
+                if digest is not None:
+                    first_index.setdefault(digest, i)
+            parsed: Dict[Tuple[str, bytes], Dict[str, Any]] = {}
+            for digest, i in parsed_by.items():
+                j = first_index[digest]
+                if j != i:
+                    payload, payloads[i] = payloads[i], None
+                    payloads[j] = {**payload, **_page_identity(links[j])} if isinstance(payload, dict) else payload
+                if isinstance(payloads[j], dict):
+                    parsed[links[j], digest] = payloads[j]
+            # Only this run's pages are kept, so the cache never outgrows one crawl
+            _parse_cache.clear()
+            _parse_cache.update(parsed)
+            for link, payload in zip(links, payloads):
+                if isinstance(payload, Exception):
+                    logger.warning("Failed to parse %s: %s", link, payload)
+                elif payload is None:
+                    logger.debug("Skipping duplicate page: %s", link)
+                elif payload.get("name") and (payload.get("sub_challenges") or payload.get("rewards")):
+                    results.append(_intern_payload(payload))
+                else:
+                    logger.debug("Skipping empty set: %s", link)
+
+        logger.info("Successfully parsed %d SBC sets", len(results))
         return results
     except Exception as e:
-        print(f"💥 crawl_all_sets failed: {e}")
+        logger.exception("crawl_all_sets failed: %s", e)
         return []
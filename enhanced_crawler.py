@@ -1,23 +1,95 @@
 import asyncio
 import json
+import logging
 import re
-from typing import Dict, Any, List, Optional
+from typing import Dict, Any, List, Optional, Set, Union
 from urllib.parse import urljoin
 from datetime import datetime, timezone
 
 import httpx
-from bs4 import BeautifulSoup
+from bs4 import BeautifulSoup, SoupStrainer
 from normalizer import normalize_requirements
 
+logger = logging.getLogger(__name__)
+
 # Optional: Only import if Playwright is available
 try:
     from playwright.async_api import async_playwright
     PLAYWRIGHT_AVAILABLE = True
 except ImportError:
     PLAYWRIGHT_AVAILABLE = False
-    print("⚠️ Playwright not available - dynamic content extraction disabled")
+    logger.warning("Playwright not available - dynamic content extraction disabled")
 
 HOME = "https://www.fut.gg"
+PAGE_ENCODING = "utf-8"  # fut.gg serves UTF-8; pages are handed to the parser as bytes
+
+STATIC_HEADERS = {
+    "User-Agent": (
+        "Mozilla/5.0 (Windows NT 10.0; Win64; x64) "
+        "AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0 Safari/537.36"
+    ),
+    "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8",
+    "Accept-Language": "en-US,en;q=0.5",
+    "Accept-Encoding": "zstd, br, gzip, deflate",
+    "Cache-Control": "max-age=0",
+}
+
+# One pooled HTTP/2 client is shared by every static fetch
+STATIC_LIMITS = httpx.Limits(max_connections=100, max_keepalive_connections=50, keepalive_expiry=30)
+STATIC_TIMEOUT = httpx.Timeout(30.0, connect=10.0)
+
+def make_client() -> httpx.AsyncClient:
+    """Client with the headers, limits and redirect handling static fetches expect"""
+    return httpx.AsyncClient(
+        http2=True,
+        limits=STATIC_LIMITS,
+        timeout=STATIC_TIMEOUT,
+        headers=STATIC_HEADERS,
+        follow_redirects=True,
+    )
+
+LINK_STRAINER = SoupStrainer("a", href=True)
+
+EXPIRY_RES = [
+    re.compile(p, re.I)
+    for p in (
+        r"expires?:?\s*(\d{1,2}[/\-]\d{1,2}[/\-]\d{4})",
+        r"ends?:?\s*(\d{1,2}[/\-]\d{1,2}[/\-]\d{4})",
+        r"available until:?\s*(\d{1,2}[/\-]\d{1,2}[/\-]\d{4})",
+    )
+]
+DATE_SPLIT_RE = re.compile(r"[/\-]")
+
+# Tag names looked up by the static fallback; plain names go through
+# find_all() rather than the CSS matcher
+FALLBACK_CONTAINER_TAGS = ("div", "section", "article")
+HEADING_TAGS = ("h1", "h2", "h3", "h4", "h5", "h6")
+BLOCK_TAGS = ("div", "span", "p")
+# Everything the per-container pass needs, so one walk can bucket it by tag
+CONTAINER_WALK_TAGS = frozenset(HEADING_TAGS + BLOCK_TAGS + ("li",))
+
+# Phrases that rule a line out as an SBC requirement
+SKIP_PHRASES = (
+    'solution', 'cheapest', 'price', 'reward', 'pack', 'squad builder',
+    'building chemistry', 'fill player positions', 'total cost',
+    'discord', 'instagram', 'futbin', 'fut.gg', 'twitter', 'youtube',
+    'subscribe', 'follow', 'like', 'comment', 'share', 'video',
+    'guide', 'tutorial', 'walkthrough', 'gameplay'
+)
+
+# At least one of these must appear in a requirement line
+REQUIREMENT_KEYWORDS = (
+    'min', 'max', 'exactly', 'chemistry', 'rating', 'players from',
+    'league', 'club', 'nation', 'ovr', 'overall', 'same', 'different',
+    'rare', 'gold', 'silver', 'bronze', 'team rating', 'squad rating'
+)
+
+# A container needs one of these before its requirements are extracted
+CONTAINER_KEYWORDS = ('min', 'chemistry', 'rating', 'players')
+
+# Each phrase list as one alternation, so a line is scanned once per list
+SKIP_RE = re.compile("|".join(map(re.escape, SKIP_PHRASES)))
+REQUIREMENT_KEYWORD_RE = re.compile("|".join(map(re.escape, REQUIREMENT_KEYWORDS)))
 
 async def check_playwright_available():
     """Check if Playwright browsers are actually available"""
@@ -42,7 +114,7 @@ class EnhancedSBCCrawler:
             # Check if browsers are actually available before trying to launch
             self.browser_actually_available = await check_playwright_available()
             if not self.browser_actually_available:
-                print("⚠️ Playwright installed but browsers not available - falling back to static parsing")
+                logger.warning("Playwright installed but browsers not available - falling back to static parsing")
                 self.use_browser = False
                 return self
                 
@@ -60,51 +132,30 @@ class EnhancedSBCCrawler:
         if self.browser:
             await self.browser.close()
 
-    async def fetch_html_static(self, client: httpx.AsyncClient, url: str) -> str:
+    async def fetch_html_static(self, client: httpx.AsyncClient, url: str) -> bytes:
         """Fetch HTML using static HTTP request"""
-        headers = {
-            "User-Agent": (
-                "Mozilla/5.0 (Windows NT 10.0; Win64; x64) "
-                "AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0 Safari/537.36"
-            ),
-            "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8",
-            "Accept-Language": "en-US,en;q=0.5",
-            "Accept-Encoding": "gzip, deflate",
-            "Connection": "keep-alive",
-            "Cache-Control": "max-age=0",
-        }
-        r = await client.get(url, timeout=30, follow_redirects=True, headers=headers)
+        # Callers may pass their own client, so don't rely on its defaults
+        r = await client.get(url, headers=STATIC_HEADERS, timeout=STATIC_TIMEOUT, follow_redirects=True)
         r.raise_for_status()
-        return r.text
+        return r.content
 
     def _looks_like_requirement(self, text: str) -> bool:
         """Check if text looks like an SBC requirement"""
-        if not text or len(text.strip()) < 8:
+        if not text:
+            return False
+        text = text.strip()
+        if len(text) < 8:
             return False
         
-        text = text.strip().lower()
+        text = text.lower()
         
         # Skip obvious non-requirements
-        skip_phrases = [
-            'solution', 'cheapest', 'price', 'reward', 'pack', 'squad builder',
-            'building chemistry', 'fill player positions', 'total cost',
-            'discord', 'instagram', 'futbin', 'fut.gg', 'twitter', 'youtube',
-            'subscribe', 'follow', 'like', 'comment', 'share', 'video',
-            'guide', 'tutorial', 'walkthrough', 'gameplay'
-        ]
-        
-        if any(phrase in text for phrase in skip_phrases):
+        if SKIP_RE.search(text):
             return False
         
         # Must have requirement keywords
-        requirement_keywords = [
-            'min', 'max', 'exactly', 'chemistry', 'rating', 'players from',
-            'league', 'club', 'nation', 'ovr', 'overall', 'same', 'different',
-            'rare', 'gold', 'silver', 'bronze', 'team rating', 'squad rating'
-        ]
-        
-        has_keyword = any(keyword in text for keyword in requirement_keywords)
-        has_number = any(char.isdigit() for char in text)
+        has_keyword = REQUIREMENT_KEYWORD_RE.search(text) is not None
+        has_number = any(map(str.isdigit, text))
         reasonable_length = 8 <= len(text) <= 150
         
         return has_keyword and has_number and reasonable_length
@@ -112,15 +163,17 @@ class EnhancedSBCCrawler:
     async def parse_sbc_page_enhanced(self, url: str, client: httpx.AsyncClient) -> Dict[str, Any]:
         """Enhanced parsing with comprehensive requirement detection"""
         
-        print(f"\n🔍 ENHANCED ANALYSIS: {url}")
+        logger.debug("Enhanced analysis: %s", url)
         
         # Get static HTML first
         static_html = await self.fetch_html_static(client, url)
-        static_soup = BeautifulSoup(static_html, "html.parser")
+        # Tree building and the static heuristics are CPU-bound; run them in a
+        # worker thread so the other pages' fetches keep moving meanwhile
+        static_soup = await asyncio.to_thread(BeautifulSoup, static_html, "lxml", from_encoding=PAGE_ENCODING)
         
         # Extract title
         sbc_name = None
-        title_el = static_soup.select_one("title")
+        title_el = static_soup.find("title")
         if title_el:
             sbc_name = title_el.get_text(strip=True).replace(" | FUT.GG", "").replace("FUT.GG - ", "")
         
@@ -133,7 +186,7 @@ class EnhancedSBCCrawler:
                 await page.goto(url, wait_until='networkidle', timeout=30000)
                 await page.wait_for_timeout(3000)
                 
-                print("  🤖 Using browser-based extraction")
+                logger.debug("Using browser-based extraction")
                 
                 # Method 1: Use JavaScript to find ALL requirement-like text
                 requirement_candidates = await page.evaluate("""
@@ -170,7 +223,7 @@ class EnhancedSBCCrawler:
                     }
                 """)
                 
-                print(f"  Found {len(requirement_candidates)} potential requirements")
+                logger.debug("Found %d potential requirements", len(requirement_candidates))
                 
                 # Method 2: Look for structural containers
                 container_selectors = [
@@ -196,7 +249,7 @@ class EnhancedSBCCrawler:
                             
                             # Check if this looks like a challenge container
                             container_lower = container_text.lower()
-                            if not any(word in container_lower for word in ['min', 'chemistry', 'rating', 'players']):
+                            if not any(word in container_lower for word in CONTAINER_KEYWORDS):
                                 continue
                             
                             # Extract challenge name
@@ -241,15 +294,13 @@ class EnhancedSBCCrawler:
                             container_requirements = [req for req in container_requirements if len(req) > 8]
                             
                             if container_requirements:
-                                print(f"    ✅ Challenge '{challenge_name}': {len(container_requirements)} requirements")
-                                for req in container_requirements[:3]:
-                                    print(f"      - {req}")
+                                logger.debug("Challenge %r: %d requirements", challenge_name, len(container_requirements))
                                 
                                 # Normalize requirements
                                 try:
                                     normalized_requirements = normalize_requirements(container_requirements)
                                 except Exception as e:
-                                    print(f"      ⚠️ Normalization failed: {e}")
+                                    logger.debug("Normalization failed: %s", e)
                                     normalized_requirements = [{"kind": "raw", "text": req} for req in container_requirements]
                                 
                                 challenges.append({
@@ -265,7 +316,7 @@ class EnhancedSBCCrawler:
                                     break
                     
                     except Exception as e:
-                        print(f"    ⚠️ Error with selector {selector}: {e}")
+                        logger.debug("Error with selector %s: %s", selector, e)
                         continue
                     
                     # If we found challenges, don't need to try more selectors
@@ -274,7 +325,7 @@ class EnhancedSBCCrawler:
                 
                 # If browser method didn't work, try the requirement candidates directly
                 if not challenges and requirement_candidates:
-                    print("  📋 Grouping individual requirements into challenges")
+                    logger.debug("Grouping individual requirements into challenges")
                     
                     # Group requirements by their parent containers
                     grouped_reqs = {}
@@ -301,53 +352,55 @@ class EnhancedSBCCrawler:
                                 "raw_requirements": reqs
                             })
                             
-                            print(f"    ✅ Grouped Challenge {i+1}: {len(reqs)} requirements")
+                            logger.debug("Grouped challenge %d: %d requirements", i + 1, len(reqs))
                 
                 await page.close()
                 
             except Exception as e:
-                print(f"  💥 Browser parsing failed: {e}")
+                logger.warning("Browser parsing failed for %s: %s", url, e)
                 # Fall back to static parsing
-                challenges = self._parse_static_fallback(static_soup)
+                challenges = await asyncio.to_thread(self._parse_static_fallback, static_soup)
         
         else:
             # Static parsing only
-            print("  📄 Using static parsing")
-            challenges = self._parse_static_fallback(static_soup)
+            logger.debug("Using static parsing")
+            challenges = await asyncio.to_thread(self._parse_static_fallback, static_soup)
         
         # Remove duplicate challenges based on requirements
         unique_challenges = []
         seen_req_sets = set()
         
         for challenge in challenges:
-            # Create a signature based on the requirements
-            req_texts = [req.get('text', '') for req in challenge.get('requirements', [])]
-            req_signature = '|'.join(sorted(req_texts))
+            # Signature is the sorted requirement texts; the tuple hashes
+            # without joining them into one string per challenge
+            req_signature = tuple(sorted(req.get('text', '') for req in challenge.get('requirements', [])))
             
             if req_signature and req_signature not in seen_req_sets:
                 seen_req_sets.add(req_signature)
                 unique_challenges.append(challenge)
+                if len(unique_challenges) == 10:  # Limit to 10 challenges max
+                    break
         
-        challenges = unique_challenges[:10]  # Limit to 10 challenges max
+        challenges = unique_challenges
         
         total_requirements = sum(len(ch.get('requirements', [])) for ch in challenges)
-        print(f"  🎯 FINAL: {len(challenges)} challenges, {total_requirements} requirements")
+        logger.debug("%s: %d challenges, %d requirements", url, len(challenges), total_requirements)
         
         if total_requirements == 0:
-            print("  ⚠️ No requirements found - this might indicate a parsing issue")
+            logger.debug("No requirements found for %s - this might indicate a parsing issue", url)
         
         return {
             "slug": url.replace(HOME, ""),
             "url": url,
             "name": sbc_name,
-            "expires_at": self._extract_expiry(static_soup),
+            "expires_at": self._extract_expiry(static_soup.get_text(" ", strip=True)),
             "sub_challenges": challenges,
             "rewards": []
         }
 
     def _parse_static_fallback(self, soup: BeautifulSoup) -> List[Dict[str, Any]]:
         """Comprehensive static parsing fallback"""
-        print("    📄 Using comprehensive static parsing")
+        logger.debug("Using comprehensive static parsing")
         
         challenges = []
         
@@ -360,7 +413,7 @@ class EnhancedSBCCrawler:
             if self._looks_like_requirement(text):
                 potential_requirements.append(text)
         
-        print(f"    Found {len(potential_requirements)} potential requirements in static HTML")
+        logger.debug("Found %d potential requirements in static HTML", len(potential_requirements))
         
         if potential_requirements:
             # Group requirements logically
@@ -403,9 +456,9 @@ class EnhancedSBCCrawler:
         
         # Strategy 2: If Strategy 1 failed, look for structured containers
         if not challenges:
-            print("    📦 Trying container-based parsing")
+            logger.debug("Trying container-based parsing")
             
-            containers = soup.select('div, section, article')
+            containers = soup.find_all(FALLBACK_CONTAINER_TAGS)
             
             for container in containers:
                 container_text = container.get_text(' ', strip=True)
@@ -413,12 +466,23 @@ class EnhancedSBCCrawler:
                     continue
                 
                 # Check if container has requirement-like content
-                if not any(word in container_text.lower() for word in ['min', 'chemistry', 'rating', 'players']):
+                container_lower = container_text.lower()
+                if not any(word in container_lower for word in CONTAINER_KEYWORDS):
                     continue
                 
+                # One walk collects headings, list items and blocks in document order
+                headers, items, blocks = [], [], []
+                for el in container.find_all(CONTAINER_WALK_TAGS):
+                    if el.name == "li":
+                        items.append(el)
+                    elif el.name in BLOCK_TAGS:
+                        blocks.append(el)
+                    else:
+                        headers.append(el)
+                
                 # Extract challenge name
                 challenge_name = "Unknown Challenge"
-                for header in container.select('h1, h2, h3, h4, h5, h6'):
+                for header in headers:
                     header_text = header.get_text(strip=True)
                     if header_text and 3 < len(header_text) < 100:
                         challenge_name = header_text
@@ -428,14 +492,14 @@ class EnhancedSBCCrawler:
                 requirements = []
                 
                 # Try list items first
-                for li in container.select('li'):
+                for li in items:
                     li_text = li.get_text(strip=True)
                     if self._looks_like_requirement(li_text):
                         requirements.append(li_text)
                 
                 # Try other elements
                 if not requirements:
-                    for elem in container.select('div, span, p'):
+                    for elem in blocks:
                         elem_text = elem.get_text(strip=True)
                         if self._looks_like_requirement(elem_text) and len(elem_text) < 100:
                             requirements.append(elem_text)
@@ -465,93 +529,110 @@ class EnhancedSBCCrawler:
                         "raw_requirements": requirements
                     })
                     
-                    print(f"    ✅ Container challenge '{challenge_name}': {len(requirements)} requirements")
+                    logger.debug("Container challenge %r: %d requirements", challenge_name, len(requirements))
         
         return challenges
 
-    def _extract_expiry(self, soup: BeautifulSoup) -> Optional[datetime]:
-        """Extract expiry date from HTML"""
-        txt = soup.get_text(" ", strip=True)
-        for pat in (
-            r"expires?:?\s*(\d{1,2}[/\-]\d{1,2}[/\-]\d{4})",
-            r"ends?:?\s*(\d{1,2}[/\-]\d{1,2}[/\-]\d{4})",
-            r"available until:?\s*(\d{1,2}[/\-]\d{1,2}[/\-]\d{4})",
-        ):
-            m = re.search(pat, txt, re.I)
+    def _extract_expiry(self, page_text: str) -> Optional[datetime]:
+        """Extract expiry date from the page's flattened text"""
+        for pat in EXPIRY_RES:
+            m = pat.search(page_text)
             if not m:
                 continue
             d = m.group(1)
             try:
-                day, month, year = map(int, re.split(r"[/\-]", d))
+                day, month, year = map(int, DATE_SPLIT_RE.split(d))
                 return datetime(year, month, day, tzinfo=timezone.utc)
             except Exception:
                 pass
         return None
 
+CATEGORIES = ["live", "players", "icons", "upgrades", "foundations"]
+
+# Pages parsed at once; each may hold an open browser page, so keep this modest
+MAX_CONCURRENCY = 8
+
 # Updated crawl function
 async def crawl_all_sets_enhanced(use_browser: bool = True, debug_first: bool = True) -> List[Dict[str, Any]]:
     """Enhanced crawling with comprehensive requirement detection"""
     results = []
     
     async with EnhancedSBCCrawler(use_browser=use_browser) as crawler:
-        async with httpx.AsyncClient() as client:
-            print("🌐 Fetching main SBC page…")
-            list_html = await crawler.fetch_html_static(client, f"{HOME}/sbc/")
+        async with make_client() as client:
+            logger.info("Fetching main SBC page and categories")
+            list_html, *cat_htmls = await asyncio.gather(
+                crawler.fetch_html_static(client, f"{HOME}/sbc/"),
+                *(crawler.fetch_html_static(client, f"{HOME}/sbc/{cat}/") for cat in CATEGORIES),
+                return_exceptions=True,
+            )
+            if isinstance(list_html, BaseException):
+                raise list_html
             links = discover_set_links(list_html)
             
             # Add category pages
-            for cat in ["live", "players", "icons", "upgrades", "foundations"]:
-                try:
-                    cat_html = await crawler.fetch_html_static(client, f"{HOME}/sbc/{cat}/")
-                    links.extend(discover_set_links(cat_html))
-                except Exception as e:
-                    print(f"⚠️ Category fetch failed ({cat}): {e}")
+            for cat, cat_html in zip(CATEGORIES, cat_htmls):
+                if isinstance(cat_html, BaseException):
+                    logger.warning("Category fetch failed (%s): %s", cat, cat_html)
+                    continue
+                links |= discover_set_links(cat_html)
             
-            links = sorted(set(links))
+            links = sorted(links)
             
             # Limit for testing
             if debug_first:
                 links = links[:3]  # Only test first 3 SBCs
-                print(f"🧪 Debug mode: testing first 3 SBCs only")
+                logger.info("Debug mode: testing first 3 SBCs only")
             
-            print(f"🎯 Processing {len(links)} SBC links {'with browser support' if use_browser else 'static only'}")
+            logger.info("Processing %d SBC links (%s)", len(links), "with browser support" if use_browser else "static only")
             
-            for i, link in enumerate(links, 1):
-                try:
-                    print(f"\n📋 Processing {i}/{len(links)}: {link}")
-                    payload = await crawler.parse_sbc_page_enhanced(link, client)
+            sem = asyncio.Semaphore(MAX_CONCURRENCY)
+
+            async def one(i: int, link: str) -> Dict[str, Any]:
+                async with sem:
+                    logger.debug("Processing %d/%d: %s", i, len(links), link)
+                    return await crawler.parse_sbc_page_enhanced(link, client)
+
+            payloads = await asyncio.gather(
+                *(one(i, link) for i, link in enumerate(links, 1)),
+                return_exceptions=True,
+            )
+
+            for link, payload in zip(links, payloads):
+                if isinstance(payload, BaseException):
+                    logger.warning("Failed to parse %s: %s", link, payload)
+                    continue
+
+                if payload.get("name") and payload.get("sub_challenges"):
+                    # Count actual requirements found
+                    req_count = sum(len(ch.get('requirements', [])) 
+                                  for ch in payload.get('sub_challenges', []))
                     
-                    if payload.get("name") and payload.get("sub_challenges"):
-                        # Count actual requirements found
-                        req_count = sum(len(ch.get('requirements', [])) 
-                                      for ch in payload.get('sub_challenges', []))
-                        
-                        if req_count > 0:
-                            print(f"✅ {payload['name']}: {len(payload['sub_challenges'])} challenges, {req_count} requirements")
-                            results.append(payload)
-                        else:
-                            print(f"⚠️ Skipping SBC with 0 requirements: {link}")
+                    if req_count > 0:
+                        logger.info("%s: %d challenges, %d requirements", payload["name"], len(payload["sub_challenges"]), req_count)
+                        results.append(payload)
                     else:
-                        print(f"⚠️ Skipping incomplete SBC: {link}")
-                        
-                except Exception as e:
-                    print(f"💥 Failed to parse {link}: {e}")
+                        logger.debug("Skipping SBC with 0 requirements: %s", link)
+                else:
+                    logger.debug("Skipping incomplete SBC: %s", link)
     
-    print(f"\n✅ Successfully parsed {len(results)} SBC sets with requirements")
+    logger.info("Successfully parsed %d SBC sets with requirements", len(results))
     return results
 
-def discover_set_links(list_html: str) -> List[str]:
+def discover_set_links(list_html: Union[str, bytes]) -> Set[str]:
     """Discover SBC set links from listing page HTML"""
-    soup = BeautifulSoup(list_html, "html.parser")
+    # Only anchors are needed, so don't build the rest of the tree
+    soup = BeautifulSoup(
+        list_html, "lxml", parse_only=LINK_STRAINER,
+        from_encoding=PAGE_ENCODING if isinstance(list_html, bytes) else None,
+    )
     links = set()
     
-    for a in soup.select("a[href]"):
-        href = a.get("href", "")
-        if not href:
+    for a in soup.find_all("a", href=True):
+        href = a["href"]
+        if not href.startswith("/sbc/"):
             continue
-        clean = href.split("#")[0].split("?")[0]
-        if (clean.startswith("/sbc/") and len(clean) > 5 and 
-            clean != "/sbc/" and not clean.endswith("/sbc")):
-            links.add(urljoin(HOME, clean))
+        clean = href.partition("#")[0].partition("?")[0]
+        if len(clean) > 5 and not clean.endswith("/sbc"):
+            links.add(HOME + clean if "/." not in clean else urljoin(HOME, clean))
     
-    return sorted(links)
+    return links
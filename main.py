@@ -1,7 +1,23 @@
 from fastapi import FastAPI, HTTPException
 from fastapi.responses import HTMLResponse
 from typing import List, Optional
+import atexit
+import logging
+import logging.handlers
 import os
+import queue
+
+# Records are queued by the caller and written to stderr by a background
+# listener thread, so logging never blocks the event loop on stream I/O.
+_log_queue: queue.SimpleQueue = queue.SimpleQueue()
+logging.basicConfig(
+    level=logging.INFO,
+    format="%(asctime)s %(levelname)s %(name)s: %(message)s",
+    handlers=[logging.handlers.QueueHandler(_log_queue)],
+)
+_log_listener = logging.handlers.QueueListener(_log_queue, logging.StreamHandler())
+_log_listener.start()
+atexit.register(_log_listener.stop)
 
 app = FastAPI(title="FUT SBC Tracker")
 
@@ -1,118 +1,199 @@
+import copy
+import logging
 import re
+from functools import lru_cache
 from typing import Dict, Any, List
 
+logger = logging.getLogger(__name__)
+
+# Keyword groups for the substring checks in norm_requirement
+SPECIAL_PROGRAMS = (
+    "team of the week", "totw", "tots", "team of the season",
+    "honourable mentions", "highlights", "featured", "special",
+    "in-form", "inform", "motm", "man of the match", "hero",
+    "icon", "legend", "flashback", "sbc", "objective"
+)
+RARITY_KEYWORDS = ("rare", "gold", "silver", "bronze", "common")
+NATION_INDICATORS = ("nation", "country", "nationality")
+LEAGUE_INDICATORS = ("league", "competition", "division")
+CLUB_INDICATORS = ("club", "team", "side")
+REQUIREMENT_INDICATORS = (
+    "min", "max", "exactly", "chemistry", "rating", "players", "team",
+    "squad", "club", "league", "nation", "same", "different", "rare",
+    "gold", "silver", "bronze", "ovr", "overall"
+)
+
+WHITESPACE_RE = re.compile(r"\s+")
+LIST_MARKER_RE = re.compile(r"^[•\-\*\d+\.\)]\s*")
+REQ_PREFIX_RE = re.compile(r"^(requirement|req):\s*", re.I)
+COUNT_RE = re.compile(r"(?:Min\.?\s*)?(\d+)", re.I)
+PROGRAM_COUNT_RE = re.compile(r"(?:Min\.?\s*)?(\d+)|(\d+)\s*(?:or\s*more|minimum)", re.I)
+PROGRAM_PREFIX_RE = re.compile(r"^.*?(?:Min\.?\s*\d+\s*)?Players?:?\s*", re.I)
+PROGRAM_COUNT_PREFIX_RE = re.compile(r"^.*?(?:\d+\s*(?:or\s*more\s*)?)", re.I)
+PROGRAM_SPLIT_RE = re.compile(r"\s*(?:OR|,|&)\s*", re.I)
+RARITY_COUNT_RE = re.compile(r"(?:Min\.?\s*)?(\d+)|(\d+)\s*(?:or\s*more)", re.I)
+POSITION_RE = re.compile(r"(?:GK|CB|LB|RB|LWB|RWB|CDM|CM|CAM|LM|RM|LW|RW|CF|ST)", re.I)
+
 def _clean(s: str) -> str:
     """Clean and normalize text"""
     # Remove extra whitespace and dots
-    s = re.sub(r"\s+", " ", s).strip().rstrip(".")
+    s = WHITESPACE_RE.sub(" ", s).strip().rstrip(".")
     # Remove bullet points and other list markers
-    s = re.sub(r"^[•\-\*\d+\.\)]\s*", "", s)
+    s = LIST_MARKER_RE.sub("", s)
     # Remove common prefixes
-    s = re.sub(r"^(requirement|req):\s*", "", s, flags=re.I)
+    s = REQ_PREFIX_RE.sub("", s)
     return s.strip()
 
+# Regex fallbacks tried in order once none of the keyword branches in
+# norm_requirement has matched; handlers receive the match and cleaned line.
+REQUIREMENT_PATTERNS = [
+    # Team Rating requirements (multiple variations)
+    (re.compile(r"(?:Min\.?\s*)?Team\s*Rating:?\s*(\d+)", re.I), lambda m, s: {
+        "kind": "team_rating_min", 
+        "value": int(m.group(1)),
+        "text": s
+    }),
+    (re.compile(r"(?:Min\.?\s*)?Squad\s*Rating:?\s*(\d+)", re.I), lambda m, s: {
+        "kind": "team_rating_min", 
+        "value": int(m.group(1)),
+        "text": s
+    }),
+    (re.compile(r"(?:Team|Squad)\s*(?:Rating|OVR).*?(\d+)", re.I), lambda m, s: {
+        "kind": "team_rating_min",
+        "value": int(m.group(1)),
+        "text": s
+    }),
+    (re.compile(r"(\d+)\+?\s*(?:Team|Squad)\s*(?:Rating|OVR)", re.I), lambda m, s: {
+        "kind": "team_rating_min",
+        "value": int(m.group(1)),
+        "text": s
+    }),
+
+    # Chemistry requirements
+    (re.compile(r"(?:Min\.?\s*)?(?:Squad\s*)?Chem(?:istry)?:?\s*(\d+)", re.I), lambda m, s: {
+        "kind": "chem_min",
+        "value": int(m.group(1)),
+        "text": s
+    }),
+    (re.compile(r"Chemistry.*?(\d+)", re.I), lambda m, s: {
+        "kind": "chem_min",
+        "value": int(m.group(1)),
+        "text": s
+    }),
+    (re.compile(r"(\d+)\+?\s*Chem(?:istry)?", re.I), lambda m, s: {
+        "kind": "chem_min",
+        "value": int(m.group(1)),
+        "text": s
+    }),
+
+    # Player count from specific groups (leagues, nations, clubs)
+    (re.compile(r"(?:Min\.?\s*)?(\d+)\s*Players?\s*from:?\s*(.+)", re.I), lambda m, s: {
+        "kind": "min_from",
+        "count": int(m.group(1)),
+        "key": _clean(m.group(2)),
+        "text": s
+    }),
+    (re.compile(r"(\d+)\s*(?:or\s*more\s*)?Players?\s*from\s*(.+)", re.I), lambda m, s: {
+        "kind": "min_from",
+        "count": int(m.group(1)),
+        "key": _clean(m.group(2)),
+        "text": s
+    }),
+    (re.compile(r"At\s*least\s*(\d+).*?from\s*(.+)", re.I), lambda m, s: {
+        "kind": "min_from",
+        "count": int(m.group(1)),
+        "key": _clean(m.group(2)),
+        "text": s
+    }),
+    (re.compile(r"(\d+)\+\s*(.+?)\s*(?:Players?|Cards?)", re.I), lambda m, s: {
+        "kind": "min_from",
+        "count": int(m.group(1)),
+        "key": _clean(m.group(2)),
+        "text": s
+    }),
+
+    # Count constraints (Exactly X, Max X)
+    (re.compile(r"Exactly\s*(\d+)\s*(.+)", re.I), lambda m, s: {
+        "kind": "count_constraint",
+        "op": "eq",
+        "count": int(m.group(1)),
+        "key": _clean(m.group(2)),
+        "text": s
+    }),
+    (re.compile(r"(?:Max\.?|Maximum)\s*(\d+)\s*(.+)", re.I), lambda m, s: {
+        "kind": "count_constraint",
+        "op": "le",
+        "count": int(m.group(1)),
+        "key": _clean(m.group(2)),
+        "text": s
+    }),
+    (re.compile(r"No\s*more\s*than\s*(\d+)\s*(.+)", re.I), lambda m, s: {
+        "kind": "count_constraint",
+        "op": "le",
+        "count": int(m.group(1)),
+        "key": _clean(m.group(2)),
+        "text": s
+    }),
+
+    # Player rating requirements
+    (re.compile(r"(?:Min\.?\s*)?(\d+)\s*(?:Players?\s*with\s*)?(\d+)\+?\s*(?:OVR|Overall|Rating)", re.I), lambda m, s: {
+        "kind": "min_rating_players",
+        "count": int(m.group(1)),
+        "rating": int(m.group(2)),
+        "text": s
+    }),
+    (re.compile(r"(\d+)\s*(?:or\s*more\s*)?Players?\s*(?:with\s*)?(\d+)\+?\s*(?:OVR|Overall|Rating)", re.I), lambda m, s: {
+        "kind": "min_rating_players",
+        "count": int(m.group(1)),
+        "rating": int(m.group(2)),
+        "text": s
+    }),
+    (re.compile(r"(\d+)\+\s*OVR.*?(\d+)\s*Players?", re.I), lambda m, s: {
+        "kind": "min_rating_players",
+        "rating": int(m.group(1)),
+        "count": int(m.group(2)),
+        "text": s
+    }),
+
+    # Same/Different constraints
+    (re.compile(r"(?:Max\.?\s*)?(\d+)\s*(?:Players?\s*)?from\s*(?:the\s*)?same\s*(.+)", re.I), lambda m, s: {
+        "kind": "same_constraint",
+        "op": "le",
+        "count": int(m.group(1)),
+        "key": _clean(m.group(2)),
+        "text": s
+    }),
+    (re.compile(r"(?:Min\.?\s*)?(\d+)\s*different\s*(.+)", re.I), lambda m, s: {
+        "kind": "different_constraint",
+        "op": "ge", 
+        "count": int(m.group(1)),
+        "key": _clean(m.group(2)),
+        "text": s
+    }),
+]
+
 def norm_requirement(line: str) -> Dict[str, Any]:
     """Normalize a single requirement line into structured data"""
     s = _clean(line)
     
     if not s:
         return {"kind": "empty", "text": ""}
-    
-    # Enhanced pattern matching for better detection
-    patterns = []
-    
-    # Team Rating requirements (multiple variations)
-    patterns.extend([
-        (r"(?:Min\.?\s*)?Team\s*Rating:?\s*(\d+)", lambda m: {
-            "kind": "team_rating_min", 
-            "value": int(m.group(1)),
-            "text": s
-        }),
-        (r"(?:Min\.?\s*)?Squad\s*Rating:?\s*(\d+)", lambda m: {
-            "kind": "team_rating_min", 
-            "value": int(m.group(1)),
-            "text": s
-        }),
-        (r"(?:Team|Squad)\s*(?:Rating|OVR).*?(\d+)", lambda m: {
-            "kind": "team_rating_min",
-            "value": int(m.group(1)),
-            "text": s
-        }),
-        (r"(\d+)\+?\s*(?:Team|Squad)\s*(?:Rating|OVR)", lambda m: {
-            "kind": "team_rating_min",
-            "value": int(m.group(1)),
-            "text": s
-        }),
-    ])
-    
-    # Chemistry requirements
-    patterns.extend([
-        (r"(?:Min\.?\s*)?(?:Squad\s*)?Chem(?:istry)?:?\s*(\d+)", lambda m: {
-            "kind": "chem_min",
-            "value": int(m.group(1)),
-            "text": s
-        }),
-        (r"Chemistry.*?(\d+)", lambda m: {
-            "kind": "chem_min",
-            "value": int(m.group(1)),
-            "text": s
-        }),
-        (r"(\d+)\+?\s*Chem(?:istry)?", lambda m: {
-            "kind": "chem_min",
-            "value": int(m.group(1)),
-            "text": s
-        }),
-    ])
-    
-    # Player count from specific groups (leagues, nations, clubs)
-    patterns.extend([
-        (r"(?:Min\.?\s*)?(\d+)\s*Players?\s*from:?\s*(.+)", lambda m: {
-            "kind": "min_from",
-            "count": int(m.group(1)),
-            "key": _clean(m.group(2)),
-            "text": s
-        }),
-        (r"(\d+)\s*(?:or\s*more\s*)?Players?\s*from\s*(.+)", lambda m: {
-            "kind": "min_from",
-            "count": int(m.group(1)),
-            "key": _clean(m.group(2)),
-            "text": s
-        }),
-        (r"At\s*least\s*(\d+).*?from\s*(.+)", lambda m: {
-            "kind": "min_from",
-            "count": int(m.group(1)),
-            "key": _clean(m.group(2)),
-            "text": s
-        }),
-        (r"(\d+)\+\s*(.+?)\s*(?:Players?|Cards?)", lambda m: {
-            "kind": "min_from",
-            "count": int(m.group(1)),
-            "key": _clean(m.group(2)),
-            "text": s
-        }),
-    ])
+    s_lower = s.lower()
     
     # Special program requirements (TOTW, TOTS, etc.) - Enhanced detection
-    special_programs = [
-        "team of the week", "totw", "tots", "team of the season",
-        "honourable mentions", "highlights", "featured", "special", 
-        "in-form", "inform", "motm", "man of the match", "hero",
-        "icon", "legend", "flashback", "sbc", "objective"
-    ]
-    
-    if any(program in s.lower() for program in special_programs):
+    if any(program in s_lower for program in SPECIAL_PROGRAMS):
         # Extract count
-        count_match = re.search(r"(?:Min\.?\s*)?(\d+)|(\d+)\s*(?:or\s*more|minimum)", s, re.I)
+        count_match = PROGRAM_COUNT_RE.search(s)
         count = 1
         if count_match:
             count = int(count_match.group(1) or count_match.group(2))
         
         # Extract program names, handle OR conditions
-        program_text = re.sub(r"^.*?(?:Min\.?\s*\d+\s*)?Players?:?\s*", "", s, flags=re.I)
-        program_text = re.sub(r"^.*?(?:\d+\s*(?:or\s*more\s*)?)", "", program_text, flags=re.I)
+        program_text = PROGRAM_PREFIX_RE.sub("", s)
+        program_text = PROGRAM_COUNT_PREFIX_RE.sub("", program_text)
         
         programs = []
-        for part in re.split(r"\s*(?:OR|,|&)\s*", program_text, flags=re.I):
+        for part in PROGRAM_SPLIT_RE.split(program_text):
             cleaned = _clean(part)
             if cleaned:
                 programs.append(cleaned)
@@ -127,82 +208,16 @@ def norm_requirement(line: str) -> Dict[str, Any]:
             "text": s
         }
     
-    # Count constraints (Exactly X, Max X)
-    patterns.extend([
-        (r"Exactly\s*(\d+)\s*(.+)", lambda m: {
-            "kind": "count_constraint",
-            "op": "eq",
-            "count": int(m.group(1)),
-            "key": _clean(m.group(2)),
-            "text": s
-        }),
-        (r"(?:Max\.?|Maximum)\s*(\d+)\s*(.+)", lambda m: {
-            "kind": "count_constraint",
-            "op": "le",
-            "count": int(m.group(1)),
-            "key": _clean(m.group(2)),
-            "text": s
-        }),
-        (r"No\s*more\s*than\s*(\d+)\s*(.+)", lambda m: {
-            "kind": "count_constraint",
-            "op": "le",
-            "count": int(m.group(1)),
-            "key": _clean(m.group(2)),
-            "text": s
-        }),
-    ])
-    
-    # Player rating requirements
-    patterns.extend([
-        (r"(?:Min\.?\s*)?(\d+)\s*(?:Players?\s*with\s*)?(\d+)\+?\s*(?:OVR|Overall|Rating)", lambda m: {
-            "kind": "min_rating_players",
-            "count": int(m.group(1)),
-            "rating": int(m.group(2)),
-            "text": s
-        }),
-        (r"(\d+)\s*(?:or\s*more\s*)?Players?\s*(?:with\s*)?(\d+)\+?\s*(?:OVR|Overall|Rating)", lambda m: {
-            "kind": "min_rating_players",
-            "count": int(m.group(1)),
-            "rating": int(m.group(2)),
-            "text": s
-        }),
-        (r"(\d+)\+\s*OVR.*?(\d+)\s*Players?", lambda m: {
-            "kind": "min_rating_players",
-            "rating": int(m.group(1)),
-            "count": int(m.group(2)),
-            "text": s
-        }),
-    ])
-    
-    # Same/Different constraints
-    patterns.extend([
-        (r"(?:Max\.?\s*)?(\d+)\s*(?:Players?\s*)?from\s*(?:the\s*)?same\s*(.+)", lambda m: {
-            "kind": "same_constraint",
-            "op": "le",
-            "count": int(m.group(1)),
-            "key": _clean(m.group(2)),
-            "text": s
-        }),
-        (r"(?:Min\.?\s*)?(\d+)\s*different\s*(.+)", lambda m: {
-            "kind": "different_constraint",
-            "op": "ge", 
-            "count": int(m.group(1)),
-            "key": _clean(m.group(2)),
-            "text": s
-        }),
-    ])
-    
     # Rare/Quality constraints
-    rarity_keywords = ["rare", "gold", "silver", "bronze", "common"]
-    if any(rarity in s.lower() for rarity in rarity_keywords):
-        count_match = re.search(r"(?:Min\.?\s*)?(\d+)|(\d+)\s*(?:or\s*more)", s, re.I)
+    if any(rarity in s_lower for rarity in RARITY_KEYWORDS):
+        count_match = RARITY_COUNT_RE.search(s)
         count = 1
         if count_match:
             count = int(count_match.group(1) or count_match.group(2))
         
         rarity = "rare"
-        for r in rarity_keywords:
-            if r in s.lower():
+        for r in RARITY_KEYWORDS:
+            if r in s_lower:
                 rarity = r
                 break
                 
@@ -214,9 +229,8 @@ def norm_requirement(line: str) -> Dict[str, Any]:
         }
     
     # Position requirements
-    position_pattern = r"(?:GK|CB|LB|RB|LWB|RWB|CDM|CM|CAM|LM|RM|LW|RW|CF|ST)"
-    if re.search(position_pattern, s, re.I):
-        positions = re.findall(position_pattern, s, re.I)
+    positions = POSITION_RE.findall(s)
+    if positions:
         return {
             "kind": "position_req",
             "text": s,
@@ -224,9 +238,8 @@ def norm_requirement(line: str) -> Dict[str, Any]:
         }
     
     # Nation requirements (specific handling)
-    nation_indicators = ["nation", "country", "nationality"]
-    if any(indicator in s.lower() for indicator in nation_indicators):
-        count_match = re.search(r"(?:Min\.?\s*)?(\d+)", s, re.I)
+    if any(indicator in s_lower for indicator in NATION_INDICATORS):
+        count_match = COUNT_RE.search(s)
         count = int(count_match.group(1)) if count_match else 1
         
         return {
@@ -236,9 +249,8 @@ def norm_requirement(line: str) -> Dict[str, Any]:
         }
     
     # League requirements (specific handling)
-    league_indicators = ["league", "competition", "division"]
-    if any(indicator in s.lower() for indicator in league_indicators):
-        count_match = re.search(r"(?:Min\.?\s*)?(\d+)", s, re.I)
+    if any(indicator in s_lower for indicator in LEAGUE_INDICATORS):
+        count_match = COUNT_RE.search(s)
         count = int(count_match.group(1)) if count_match else 1
         
         return {
@@ -248,9 +260,8 @@ def norm_requirement(line: str) -> Dict[str, Any]:
         }
     
     # Club requirements (specific handling) 
-    club_indicators = ["club", "team", "side"]
-    if any(indicator in s.lower() for indicator in club_indicators):
-        count_match = re.search(r"(?:Min\.?\s*)?(\d+)", s, re.I)
+    if any(indicator in s_lower for indicator in CLUB_INDICATORS):
+        count_match = COUNT_RE.search(s)
         count = int(count_match.group(1)) if count_match else 1
         
         return {
@@ -260,30 +271,30 @@ def norm_requirement(line: str) -> Dict[str, Any]:
         }
     
     # Try all patterns
-    for pattern, handler in patterns:
-        match = re.search(pattern, s, re.I)
+    for pattern, handler in REQUIREMENT_PATTERNS:
+        match = pattern.search(s)
         if match:
             try:
-                result = handler(match)
+                result = handler(match, s)
                 return result
             except (ValueError, IndexError):
                 continue
     
     # Enhanced fallback - check if it at least looks like a requirement
-    requirement_indicators = [
-        "min", "max", "exactly", "chemistry", "rating", "players", "team", 
-        "squad", "club", "league", "nation", "same", "different", "rare", 
-        "gold", "silver", "bronze", "ovr", "overall"
-    ]
-    
-    if (any(indicator in s.lower() for indicator in requirement_indicators) and 
-        any(char.isdigit() for char in s) and
+    if (any(indicator in s_lower for indicator in REQUIREMENT_INDICATORS) and 
+        any(map(str.isdigit, s)) and
         len(s) > 5):
         return {"kind": "generic_req", "text": s}
     
     # Final fallback
     return {"kind": "raw", "text": s}
 
+@lru_cache(maxsize=4096)
+def _norm_cached(line: str) -> Dict[str, Any]:
+    # The same requirement lines recur across sub-challenges and sets, and
+    # norm_requirement is a pure function of the line, so parse each once.
+    return norm_requirement(line)
+
 def normalize_requirements(lines: List[str]) -> List[Dict[str, Any]]:
     """Normalize a list of requirement lines"""
     normalized = []
@@ -293,18 +304,23 @@ def normalize_requirements(lines: List[str]) -> List[Dict[str, Any]]:
             continue
             
         try:
-            norm = norm_requirement(line)
+            norm = _norm_cached(line)
             if norm["kind"] not in ["empty"]:  # Include all non-empty requirements
-                normalized.append(norm)
+                normalized.append(copy.deepcopy(norm))  # nested lists too, so edits can't reach the cached entry
         except Exception as e:
             # Enhanced fallback for any parsing errors
-            print(f"⚠️ Failed to parse requirement '{line}': {e}")
+            logger.warning("Failed to parse requirement %r: %s", line, e)
             clean_line = _clean(line)
             if clean_line:
                 normalized.append({"kind": "raw", "text": clean_line})
     
     return normalized
 
+def normalize_requirements_batch(groups: List[List[str]]) -> List[List[Dict[str, Any]]]:
+    """Normalize several requirement lists in one call, one result list per group"""
+    # Lines shared between groups are parsed once via _norm_cached
+    return [normalize_requirements(lines) for lines in groups]
+
 def test_normalizer():
     """Enhanced test function for debugging"""
     test_cases = [
@@ -3,39 +3,56 @@ import asyncio
 from typing import Dict, Any, List, Optional
 from urllib.parse import urljoin
 import httpx
-from bs4 import BeautifulSoup
+from bs4 import BeautifulSoup, SoupStrainer
 
 HOME = "https://www.fut.gg"
 
+# The correct pattern based on the HTML structure:
+# 25-{player_id}.{hash}.webp -> we want just the player_id
+PLAYER_ID_PATTERNS = [
+    re.compile(r'25-(\d+)\.', re.I),                  # PRIMARY: Everything between 25- and next dot
+    re.compile(r'25-(\d+)\.[a-f0-9]+\.webp', re.I),  # SPECIFIC: Only .webp files with hex hash
+    re.compile(r'player-item/25-(\d+)\.', re.I),      # PATH-BASED: With player-item path
+    re.compile(r'25-(\d{6,})', re.I),                 # FALLBACK: 6+ digits after 25-
+]
+OCCURRENCE_RE = re.compile(r'25-[^\s<>"]{1,20}')
+# Only <a href> matters on SBC pages, so that's all the soup is built from
+LINK_STRAINER = SoupStrainer("a", href=True)
+
+HEADERS = {
+    "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36"
+}
+# One pooled HTTP/2 connection to fut.gg serves every solution page
+CLIENT_LIMITS = httpx.Limits(max_connections=10, max_keepalive_connections=10, keepalive_expiry=30.0)
+CLIENT_TIMEOUT = httpx.Timeout(30.0, connect=10.0)
+
+def make_client() -> httpx.AsyncClient:
+    return httpx.AsyncClient(http2=True, limits=CLIENT_LIMITS, headers=HEADERS, timeout=CLIENT_TIMEOUT)
+
 class SolutionExtractor:
     def __init__(self, use_browser: bool = False):
         self.use_browser = False  # Disable browser for Railway compatibility
+        self.client: Optional[httpx.AsyncClient] = None
         
     async def __aenter__(self):
+        self.client = make_client()
         return self
     
     async def __aexit__(self, exc_type, exc_val, exc_tb):
-        pass
+        if self.client is not None:
+            await self.client.aclose()
+            self.client = None
 
     def extract_player_ids_from_html(self, html: str) -> List[str]:
         """Extract player IDs from webp image URLs in HTML with corrected pattern"""
         print(f"  🔍 Analyzing HTML content ({len(html)} characters)")
         
-        # The correct pattern based on the HTML structure you showed:
-        # 25-{player_id}.{hash}.webp -> we want just the player_id
-        patterns = [
-            r'25-(\d+)\.',                      # PRIMARY: Everything between 25- and next dot
-            r'25-(\d+)\.[a-f0-9]+\.webp',      # SPECIFIC: Only .webp files with hex hash
-            r'player-item/25-(\d+)\.',          # PATH-BASED: With player-item path
-            r'25-(\d{6,})',                     # FALLBACK: 6+ digits after 25-
-        ]
-        
         all_matches = set()
         
-        for i, pattern in enumerate(patterns, 1):
-            matches = re.findall(pattern, html, re.IGNORECASE)
+        for i, pattern in enumerate(PLAYER_ID_PATTERNS, 1):
+            matches = pattern.findall(html)
             if matches:
-                print(f"    Pattern {i} '{pattern}' found {len(matches)} matches")
+                print(f"    Pattern {i} '{pattern.pattern}' found {len(matches)} matches")
                 all_matches.update(matches)
                 
                 # Show sample for primary pattern
@@ -58,7 +75,7 @@ class SolutionExtractor:
             # Debug: check if we have 25- at all
             if "25-" in html:
                 print("    🔍 Found '25-' in HTML, checking specific occurrences...")
-                test_matches = re.findall(r'25-[^\s<>"]{1,20}', html)
+                test_matches = OCCURRENCE_RE.findall(html)
                 print(f"    Sample 25- occurrences: {test_matches[:5]}")
         
         return unique_ids
@@ -66,15 +83,15 @@ class SolutionExtractor:
     async def get_solution_players_static(self, solution_url: str) -> List[str]:
         """Get player IDs from solution page using static HTTP request"""
         try:
-            async with httpx.AsyncClient() as client:
-                headers = {
-                    "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36"
-                }
-                response = await client.get(solution_url, headers=headers, timeout=30)
-                html = response.text
-                
-                return self.extract_player_ids_from_html(html)
-                
+            if self.client is not None:
+                response = await self.client.get(solution_url)
+            else:
+                async with make_client() as client:
+                    response = await client.get(solution_url)
+            html = response.text
+            
+            return self.extract_player_ids_from_html(html)
+            
         except Exception as e:
             print(f"  ❌ Static extraction failed: {e}")
             return []
@@ -149,12 +166,14 @@ async def find_solution_urls_for_sbc(sbc_url: str) -> List[str]:
     solution_urls = []
     
     try:
-        async with httpx.AsyncClient() as client:
-            headers = {
-                "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36"
-            }
-            response = await client.get(sbc_url, headers=headers, timeout=30)
-            soup = BeautifulSoup(response.text, "html.parser")
+        async with make_client() as client:
+            response = await client.get(sbc_url)
+            # Only trust a charset the server actually sent; otherwise let bs4
+            # pick it up from the page's own <meta charset>
+            soup = BeautifulSoup(
+                response.content, "lxml", parse_only=LINK_STRAINER,
+                from_encoding=response.charset_encoding,
+            )
             
             # Look for solution links - they typically contain "squad-builder" in the URL
             for link in soup.find_all("a", href=True):